@@ -1,13 +1,32 @@
 # main.py
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Union, Any
-import psycopg2
-from psycopg2.extras import Json
+from typing import List, Optional, Dict, Tuple, Union, Any, Callable, NamedTuple
+from collections import OrderedDict, deque
+import asyncio
+import functools
+import math
+import operator
+import re
+import asyncpg
+import numpy as np
+import orjson
 from enum import Enum
 
-app = FastAPI()
+class ORJSONResponse(JSONResponse):
+    # Batch results are keyed by integer rule_id, which orjson only
+    # accepts with OPT_NON_STR_KEYS
+    def render(self, content: Any) -> bytes:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # e.g. echoed input integers beyond 64 bits, which only the
+            # stdlib encoder handles
+            return super().render(content)
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -20,13 +39,36 @@ app.add_middleware(
 
 # Database connection
 DB_CONFIG = {
-    "dbname": "rule_engine",
+    "database": "rule_engine",
     "user": "postgres",
     "password": "rajul",
     "host": "localhost",
-    "port": "5432"
+    "port": 5432
 }
 
+# create_pool() opens POOL_MIN connections before returning, so the pool
+# is already warm when startup finishes
+POOL_MIN = 5
+POOL_MAX = 20
+
+# asyncpg prepares every query it runs and keeps up to this many prepared
+# statements per connection, so the lookups on the evaluation endpoints are
+# parsed and planned once per pooled connection rather than per request.
+# Pool resets on release do not deallocate them.
+STATEMENT_CACHE_SIZE = 256
+
+def dumps_json(value: Any) -> str:
+    return orjson.dumps(value).decode()
+
+async def init_connection(conn):
+    # Decode JSONB columns to Python objects instead of raw strings
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=dumps_json,
+        decoder=orjson.loads,
+        schema="pg_catalog"
+    )
+
 class NodeType(str, Enum):
     OPERATOR = "operator"
     OPERAND = "operand"
@@ -43,7 +85,7 @@ class Rule(BaseModel):
     name: str
     description: str
     rule_string: str
-    ast: Dict
+    ast: Any
 
 class RuleInput(BaseModel):
     rule_string: str
@@ -63,41 +105,106 @@ class BatchEvaluationInput(BaseModel):
     rule_ids: List[int]
     data_list: List[Dict[str, Any]]
 
-def create_tables():
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS rules (
-            rule_id SERIAL PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            description TEXT,
-            rule_string TEXT NOT NULL,
-            ast JSONB NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+async def create_tables(pool):
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS rules (
+                rule_id SERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                description TEXT,
+                rule_string TEXT NOT NULL,
+                ast JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            -- Fields referenced by each rule, kept in sync by Postgres and
+            -- GIN-indexed so rules can be looked up by field without
+            -- decoding every AST
+            ALTER TABLE rules ADD COLUMN IF NOT EXISTS fields_used JSONB
+                GENERATED ALWAYS AS (
+                    jsonb_path_query_array(ast, '$.**?(@.type == "comparison").left.value')
+                ) STORED;
+
+            CREATE INDEX IF NOT EXISTS rules_fields_used_idx ON rules USING GIN (fields_used);
+
+            -- One row per distinct rule string; resubmitting a rule updates
+            -- its name and description instead of storing another copy
+            CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+            ALTER TABLE rules ADD COLUMN IF NOT EXISTS rule_hash BYTEA
+                GENERATED ALWAYS AS (digest(rule_string, 'sha256')) STORED;
+        """)
+
+        # Tables created before rule_hash existed may hold repeated rule
+        # strings. Refuse to start rather than decide which rows to drop.
+        if await conn.fetchval("SELECT to_regclass('rules_rule_hash_key')") is None:
+            duplicates = await conn.fetch("""
+                SELECT array_agg(rule_id ORDER BY rule_id) AS rule_ids
+                FROM rules
+                GROUP BY rule_hash
+                HAVING count(*) > 1
+                ORDER BY min(rule_id)
+            """)
+            if duplicates:
+                clashes = "; ".join(", ".join(map(str, row["rule_ids"])) for row in duplicates)
+                raise RuntimeError(
+                    f"Duplicate rule strings in rules (rule_ids {clashes}). "
+                    "Run backend/migrations/dedupe_rule_strings.sql, then restart."
+                )
+
+        await conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS rules_rule_hash_key ON rules (rule_hash)")
+
+async def insert_rules(conn, rules: List[Tuple[str, str, str, Dict]]) -> List[asyncpg.Record]:
+    """Insert (name, description, rule_string, ast) rows in one round-trip.
+
+    A rule whose rule_string is already stored keeps its rule_id and AST and
+    only takes the new name and description. Rule strings must be distinct
+    within one call. Returns one (rule_id, ast_hash) record per rule, in
+    input order.
+    """
+    names, descriptions, rule_strings, asts = zip(*rules)
+    return await conn.fetch(
+        """
+        WITH input AS (
+            SELECT *
+            FROM unnest($1::varchar[], $2::text[], $3::text[], $4::text[]) WITH ORDINALITY
+                AS r(name, description, rule_string, ast, position)
+        ), upserted AS (
+            INSERT INTO rules (name, description, rule_string, ast)
+            SELECT name, description, rule_string, ast::jsonb FROM input ORDER BY position
+            ON CONFLICT (rule_hash) DO UPDATE
+                SET name = EXCLUDED.name, description = EXCLUDED.description
+            RETURNING rule_id, rule_string, md5(ast::text) AS ast_hash
         )
-    """)
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+        SELECT upserted.rule_id, upserted.ast_hash
+        FROM upserted JOIN input USING (rule_string)
+        ORDER BY input.position
+        """,
+        names, descriptions, rule_strings, [dumps_json(ast) for ast in asts]
+    )
+
+PARSE_CACHE_SIZE = 1024
 
+# A parenthesis, or a run of anything that is neither whitespace nor a parenthesis
+_TOK_RE = re.compile(r'\(|\)|[^\s()]+')
+
+# Cached ASTs are shared between callers and must not be mutated
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_rule(rule_string: str) -> Node:
     def tokenize(s: str) -> List[str]:
-        s = s.replace('(', ' ( ').replace(')', ' ) ')
-        return [token.strip() for token in s.split() if token.strip()]
+        return _TOK_RE.findall(s)
     
-    def build_ast(tokens: List[str]) -> Dict:
+    def build_ast(tokens: "deque[str]") -> Dict:
         if not tokens:
             raise ValueError("Empty rule string")
             
-        token = tokens.pop(0)
+        token = tokens.popleft()
         
         if token == '(':
             left = build_ast(tokens)
-            op = tokens.pop(0)  # AND/OR
+            op = tokens.popleft()  # AND/OR
             right = build_ast(tokens)
-            tokens.pop(0)  # Remove closing parenthesis
+            tokens.popleft()  # Remove closing parenthesis
             return {
                 "type": "operator",
                 "value": op,
@@ -107,8 +214,8 @@ def parse_rule(rule_string: str) -> Node:
         else:
             # Handle comparison operations
             field = token
-            op = tokens.pop(0)
-            value = tokens.pop(0)
+            op = tokens.popleft()
+            value = tokens.popleft()
             return {
                 "type": "comparison",
                 "value": op,
@@ -116,68 +223,298 @@ def parse_rule(rule_string: str) -> Node:
                 "right": {"type": "operand", "value": value}
             }
     
-    tokens = tokenize(rule_string)
+    tokens = deque(tokenize(rule_string))
     return build_ast(tokens)
 
+# Comparison operators in rule syntax; these work on scalars and NumPy columns alike
+OP_TABLE = {'>': operator.gt, '<': operator.lt, '=': operator.eq, '>=': operator.ge, '<=': operator.le}
+
 def evaluate_node(node: Dict, data: Dict) -> bool:
     if node["type"] == "operator":
-        left_result = evaluate_node(node["left"], data)
-        right_result = evaluate_node(node["right"], data)
-        
+        # Only descend into the right branch when the left one doesn't
+        # already decide the result
         if node["value"] == "AND":
-            return left_result and right_result
+            return evaluate_node(node["left"], data) and evaluate_node(node["right"], data)
         elif node["value"] == "OR":
-            return left_result or right_result
+            return evaluate_node(node["left"], data) or evaluate_node(node["right"], data)
             
     elif node["type"] == "comparison":
         field = node["left"]["value"]
         op = node["value"]
-        expected_value = node["right"]["value"]
         
         if field not in data:
             raise ValueError(f"Field {field} not found in data")
             
         actual_value = data[field]
+        text, number = _parse_literal(node["right"]["value"])
+        expected_value = _coerce(actual_value, field, text, number)
         
-        if isinstance(actual_value, (int, float)):
-            try:
-                expected_value = expected_value.strip("'").strip('"')
-                expected_value = float(expected_value)
-                if isinstance(actual_value, int):
-                    expected_value = int(expected_value)
-            except ValueError:
-                raise ValueError(f"Cannot compare numeric field '{field}' with non-numeric value '{expected_value}'")
-        else:
-            expected_value = expected_value.strip("'").strip('"')
-            
-        if op == '>':
-            return actual_value > expected_value
-        elif op == '<':
-            return actual_value < expected_value
-        elif op == '=':
-            return actual_value == expected_value
-        elif op == '>=':
-            return actual_value >= expected_value
-        elif op == '<=':
-            return actual_value <= expected_value
+        compare = OP_TABLE.get(op)
+        if compare is not None:
+            return compare(actual_value, expected_value)
             
     return False
 
+# Comparison operators in rule syntax mapped to their Python spelling
+PY_COMPARISON_OPS = {'>': '>', '<': '<', '=': '==', '>=': '>=', '<=': '<='}
+
+COMPILED_CACHE_SIZE = 1024
+
+# Batches smaller than this are cheaper to evaluate row by row
+VECTORIZE_MIN_ROWS = 64
+
+# Batches at least this large are evaluated in a worker thread so they
+# don't hold up other requests on the event loop
+EXECUTOR_MIN_ROWS = 1000
+
+# Largest share of undecided rows for which vector_mask evaluates an
+# AND/OR right branch on just those rows instead of the whole column
+SUBSET_MAX_FRACTION = 0.1
+
+INT64_MIN, INT64_MAX = -2**63, 2**63 - 1
+
+class CompiledRule(NamedTuple):
+    ast: Dict
+    evaluate: Callable[[Dict], bool]
+
+LITERAL_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=LITERAL_CACHE_SIZE)
+def _parse_literal(value: str) -> Tuple[str, Optional[float]]:
+    """Strip quotes from a literal and parse it as a number where possible."""
+    text = value.strip("'").strip('"')
+    try:
+        return text, float(text)
+    except ValueError:
+        return text, None
+
+def _field(data: Dict, field: str) -> Any:
+    if field not in data:
+        raise ValueError(f"Field {field} not found in data")
+    return data[field]
+
+def _coerce(actual_value: Any, field: str, text: str, number: Optional[float]) -> Any:
+    # Numeric fields compare against the parsed literal (truncated for ints),
+    # everything else against the unquoted text
+    if isinstance(actual_value, (int, float)):
+        is_int = isinstance(actual_value, int)
+        # NaN and infinity have no int counterpart to truncate to
+        if number is None or (is_int and not math.isfinite(number)):
+            raise ValueError(f"Cannot compare numeric field '{field}' with non-numeric value '{text}'")
+        return int(number) if is_int else number
+    return text
+
+def _unsupported_comparison(actual_value: Any, field: str, text: str, number: Optional[float]) -> bool:
+    # evaluate_node still validates the field and literal for operators
+    # it cannot apply, so missing fields and bad literals raise here too
+    _coerce(actual_value, field, text, number)
+    return False
+
+_RULE_GLOBALS = {
+    "__builtins__": {},
+    "_field": _field,
+    "_coerce": _coerce,
+    "_unsupported_comparison": _unsupported_comparison,
+    "_float": float
+}
+
+def compile_ast(node: Dict) -> str:
+    """Translate an AST into a Python expression over `data`."""
+    if node["type"] == "operator":
+        if node["value"] in ("AND", "OR"):
+            op = node["value"].lower()
+            return f"({compile_ast(node['left'])} {op} {compile_ast(node['right'])})"
+
+    elif node["type"] == "comparison":
+        field = node["left"]["value"]
+        text, number = _parse_literal(node["right"]["value"])
+        if number is None:
+            literal = "None"
+        elif math.isfinite(number):
+            literal = repr(number)
+        else:
+            literal = f"_float({text!r})"
+        op = PY_COMPARISON_OPS.get(node["value"])
+        if op is None:
+            return f"_unsupported_comparison(_field(data, {field!r}), {field!r}, {text!r}, {literal})"
+        return f"((_x := _field(data, {field!r})) {op} _coerce(_x, {field!r}, {text!r}, {literal}))"
+
+    return "False"
+
+def compile_rule(ast: Dict) -> CompiledRule:
+    try:
+        code = compile(f"lambda data: {compile_ast(ast)}", "<rule>", "eval")
+    except (SyntaxError, RecursionError, MemoryError):
+        # Deeply nested rules (e.g. long combine chains) exceed the
+        # compiler's nesting limit; interpret those instead
+        return CompiledRule(ast=ast, evaluate=functools.partial(evaluate_node, ast))
+    return CompiledRule(ast=ast, evaluate=eval(code, _RULE_GLOBALS))
+
+def _column(data_list: List[Dict], field: str) -> Optional[np.ndarray]:
+    """Collect `field` into an array if every row holds a value of the same
+    plain int, float or str type that NumPy stores exactly; otherwise
+    return None."""
+    column_type = None
+    values = []
+    for data in data_list:
+        if field not in data:
+            return None
+        value = data[field]
+        if column_type is None:
+            column_type = type(value)
+            if column_type not in (int, float, str):
+                return None
+        elif type(value) is not column_type:
+            return None
+        values.append(value)
+
+    # NumPy str arrays drop trailing NULs, which would change comparisons
+    if column_type is str and any(value.endswith("\x00") for value in values):
+        return None
+
+    try:
+        column = np.array(values)
+    except OverflowError:
+        return None
+    return column if column.dtype.kind in "ifU" else None
+
+def vector_mask(
+    node: Dict,
+    data_list: List[Dict],
+    columns: Dict[str, Optional[np.ndarray]],
+    rows: Optional[np.ndarray] = None
+) -> Optional[np.ndarray]:
+    """Evaluate an AST over every row at once, or over just `rows` if given.
+
+    Returns None when some row would take a different path than the rest
+    (missing field, mixed types, uncomparable literal), in which case the
+    caller falls back to row-by-row evaluation.
+    """
+    size = len(data_list) if rows is None else len(rows)
+
+    if node["type"] == "operator":
+        if node["value"] not in ("AND", "OR"):
+            return np.zeros(size, dtype=bool)
+        left = vector_mask(node["left"], data_list, columns, rows)
+        if left is None:
+            return None
+        # Like `and`/`or`, skip the right branch when the left one decides
+        # every row. Gathering and scattering a row subset costs more than a
+        # full-column compare, so only narrow to the undecided rows when
+        # they are a small fraction of the column.
+        undecided = left if node["value"] == "AND" else ~left
+        undecided_count = np.count_nonzero(undecided)
+        if undecided_count == 0:
+            return left
+        if undecided_count <= size * SUBSET_MAX_FRACTION:
+            right_rows = np.flatnonzero(undecided) if rows is None else rows[undecided]
+            right = vector_mask(node["right"], data_list, columns, right_rows)
+            if right is None:
+                return None
+            left[undecided] = right
+            return left
+
+        right = vector_mask(node["right"], data_list, columns, rows)
+        if right is None:
+            return None
+        # Both masks are fresh arrays, so fold the right one into the left
+        # in place rather than allocating a third per operator node
+        if node["value"] == "AND":
+            left &= right
+        else:
+            left |= right
+        return left
+
+    elif node["type"] == "comparison":
+        compare = OP_TABLE.get(node["value"])
+        if compare is None:
+            return None
+        field = node["left"]["value"]
+        if field not in columns:
+            columns[field] = _column(data_list, field)
+        column = columns[field]
+        if column is None:
+            return None
+        if rows is not None:
+            column = column[rows]
+
+        text, number = _parse_literal(node["right"]["value"])
+        if column.dtype.kind == "U":
+            expected_value = text
+        elif number is None:
+            return None
+        elif column.dtype.kind == "i":
+            if not math.isfinite(number) or not INT64_MIN <= int(number) <= INT64_MAX:
+                return None
+            expected_value = int(number)
+        else:
+            expected_value = number
+        return compare(column, expected_value)
+
+    return np.zeros(size, dtype=bool)
+
+def evaluate_rules_batch(rules: Dict[int, CompiledRule], data_list: List[Dict]) -> List[Dict]:
+    # Rules that can be evaluated column-wise are done up front; the rest
+    # (and small batches) go through the compiled per-row function
+    masks = {}
+    if len(data_list) >= VECTORIZE_MIN_ROWS:
+        columns = {}
+        for rule_id, rule in rules.items():
+            mask = vector_mask(rule.ast, data_list, columns)
+            if mask is not None:
+                masks[rule_id] = mask.tolist()
+
+    results = []
+    for row, data in enumerate(data_list):
+        data_results = {}
+        for rule_id, rule in rules.items():
+            if rule_id in masks:
+                data_results[rule_id] = masks[rule_id][row]
+                continue
+            try:
+                data_results[rule_id] = rule.evaluate(data)
+            except Exception as e:
+                data_results[rule_id] = str(e)
+        results.append({
+            "data": data,
+            "results": data_results
+        })
+    return results
+
+# rule_id -> (md5 of the stored AST, compiled rule), least recently used first
+_compiled_rules: "OrderedDict[int, Tuple[str, CompiledRule]]" = OrderedDict()
+
+def get_compiled_rule(rule_id: int, ast_hash: str) -> Optional[CompiledRule]:
+    """Return the cached rule if it was compiled from the AST with this hash."""
+    entry = _compiled_rules.get(rule_id)
+    if entry is None or entry[0] != ast_hash:
+        return None
+    _compiled_rules.move_to_end(rule_id)
+    return entry[1]
+
+def cache_compiled_rule(rule_id: int, ast_hash: str, ast: Dict) -> CompiledRule:
+    rule = compile_rule(ast)
+    _compiled_rules[rule_id] = (ast_hash, rule)
+    _compiled_rules.move_to_end(rule_id)
+    if len(_compiled_rules) > COMPILED_CACHE_SIZE:
+        _compiled_rules.popitem(last=False)
+    return rule
+
+def evict_compiled_rule(rule_id: int) -> None:
+    _compiled_rules.pop(rule_id, None)
+
 @app.get("/health")
 async def health_check():
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        cur.execute("SELECT 1")
-        cur.close()
-        conn.close()
+        async with app.state.pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
         
         return {
             "status": "healthy",
             "database": "connected",
             "details": "Database connection successful"
         }
-    except psycopg2.Error as e:
+    except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as e:
         raise HTTPException(
             status_code=503,
             detail={
@@ -190,165 +527,164 @@ async def health_check():
 @app.post("/rules/", response_model=Rule)
 async def create_rule(rule_input: RuleInput):
     try:
-        ast = parse_rule(rule_input.rule_string)
-        
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        
-        cur.execute(
-            """
-            INSERT INTO rules (name, description, rule_string, ast)
-            VALUES (%s, %s, %s, %s)
-            RETURNING rule_id
-            """,
-            (rule_input.name, rule_input.description, rule_input.rule_string, Json(ast))
-        )
+        async with app.state.pool.acquire() as conn:
+            # A rule string that is already stored only gets its name and
+            # description refreshed, and its AST is read back unparsed
+            row = await conn.fetchrow(
+                """
+                UPDATE rules SET name = $2, description = $3
+                WHERE rule_hash = digest($1::text, 'sha256')
+                RETURNING rule_id, md5(ast::text) AS ast_hash, ast
+                """,
+                rule_input.rule_string, rule_input.name, rule_input.description
+            )
+            if row is not None:
+                ast = row["ast"]
+            else:
+                ast = parse_rule(rule_input.rule_string)
+                [row] = await insert_rules(
+                    conn, [(rule_input.name, rule_input.description, rule_input.rule_string, ast)]
+                )
+        rule_id = row["rule_id"]
+        if get_compiled_rule(rule_id, row["ast_hash"]) is None:
+            cache_compiled_rule(rule_id, row["ast_hash"], ast)
         
-        rule_id = cur.fetchone()[0]
-        conn.commit()
-        
-        return Rule(
-            rule_id=rule_id,
-            name=rule_input.name,
-            description=rule_input.description,
-            rule_string=rule_input.rule_string,
-            ast=ast
-        )
+        return {
+            "rule_id": rule_id,
+            "name": rule_input.name,
+            "description": rule_input.description,
+            "rule_string": rule_input.rule_string,
+            "ast": ast
+        }
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        cur.close()
-        conn.close()
 
 @app.get("/rules/", response_model=List[Rule])
-async def get_rules():
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
+async def get_rules(field: Optional[str] = None, include_ast: bool = True):
+    columns = "rule_id, name, description, rule_string"
+    if include_ast:
+        columns += ", ast"
+    query = f"SELECT {columns} FROM rules"
+    args = []
+    if field is not None:
+        query += " WHERE fields_used @> jsonb_build_array($1::text)"
+        args.append(field)
     
-    cur.execute("SELECT rule_id, name, description, rule_string, ast FROM rules")
-    rules = []
-    for row in cur.fetchall():
-        rules.append(Rule(
-            rule_id=row[0],
-            name=row[1],
-            description=row[2],
-            rule_string=row[3],
-            ast=row[4]
-        ))
+    async with app.state.pool.acquire() as conn:
+        rows = await conn.fetch(query, *args)
     
-    cur.close()
-    conn.close()
-    return rules
+    # Returned as-is: the rows already match Rule, and the ASTs they carry
+    # can be large, so skip response validation and re-encoding
+    return ORJSONResponse([dict(row) for row in rows])
 
 @app.delete("/rules/{rule_id}")
 async def delete_rule(rule_id: int):
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        
-        cur.execute("DELETE FROM rules WHERE rule_id = %s RETURNING rule_id", (rule_id,))
-        deleted = cur.fetchone()
+    async with app.state.pool.acquire() as conn:
+        deleted = await conn.fetchval("DELETE FROM rules WHERE rule_id = $1 RETURNING rule_id", rule_id)
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    evict_compiled_rule(rule_id)
         
-        if not deleted:
-            raise HTTPException(status_code=404, detail="Rule not found")
-            
-        conn.commit()
-        return {"message": f"Rule {rule_id} deleted successfully"}
-    finally:
-        cur.close()
-        conn.close()
+    return {"message": f"Rule {rule_id} deleted successfully"}
 
 @app.post("/rules/combine")
 async def combine_rules(input_data: CombinedRuleInput):
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        
-        cur.execute("SELECT rule_string FROM rules WHERE rule_id = ANY(%s)", (input_data.rules,))
-        rules = cur.fetchall()
+    op = input_data.operator.upper()
+    if op not in ("AND", "OR"):
+        raise HTTPException(status_code=400, detail="Operator must be AND or OR")
+    # A single rule would combine to its own rule string, and the upsert in
+    # insert_rules would then rename the original rule
+    if len(input_data.rules) < 2:
+        raise HTTPException(status_code=400, detail="At least two rules are required")
+    
+    async with app.state.pool.acquire() as conn:
+        rows = await conn.fetch("SELECT rule_id, rule_string FROM rules WHERE rule_id = ANY($1)", input_data.rules)
+        rule_strings = {row["rule_id"]: row["rule_string"] for row in rows}
         
-        if len(rules) != len(input_data.rules):
+        if any(rule_id not in rule_strings for rule_id in input_data.rules):
             raise HTTPException(status_code=404, detail="One or more rules not found")
         
-        combined_string = " " + input_data.operator + " ".join([f"({rule[0]})" for rule in rules])
-        
-        ast = parse_rule(combined_string)
-        
-        cur.execute(
-            """
-            INSERT INTO rules (name, description, rule_string, ast)
-            VALUES (%s, %s, %s, %s)
-            RETURNING rule_id
-            """,
-            (input_data.name, input_data.description, combined_string, Json(ast))
+        # build_ast reads one operator per parenthesised group, so fold the
+        # rules pairwise in request order: ((r1 OP r2) OP r3) ...
+        combined_string = functools.reduce(
+            lambda left, right: f"({left} {op} {right})",
+            (rule_strings[rule_id] for rule_id in input_data.rules)
         )
         
-        rule_id = cur.fetchone()[0]
-        conn.commit()
+        ast = parse_rule(combined_string)
         
-        return Rule(
-            rule_id=rule_id,
-            name=input_data.name,
-            description=input_data.description,
-            rule_string=combined_string,
-            ast=ast
+        [row] = await insert_rules(
+            conn, [(input_data.name, input_data.description, combined_string, ast)]
         )
-    finally:
-        cur.close()
-        conn.close()
+    rule_id = row["rule_id"]
+    cache_compiled_rule(rule_id, row["ast_hash"], ast)
+    
+    return {
+        "rule_id": rule_id,
+        "name": input_data.name,
+        "description": input_data.description,
+        "rule_string": combined_string,
+        "ast": ast
+    }
 
 @app.post("/rules/evaluate/{rule_id}")
 async def evaluate_rule(rule_id: int, data: EvaluationData):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    
-    cur.execute("SELECT ast FROM rules WHERE rule_id = %s", (rule_id,))
-    result = cur.fetchone()
+    async with app.state.pool.acquire() as conn:
+        ast = await conn.fetchval("SELECT ast FROM rules WHERE rule_id = $1", rule_id)
     
-    if not result:
+    if ast is None:
         raise HTTPException(status_code=404, detail="Rule not found")
         
-    ast = result[0]
     try:
         evaluation_result = evaluate_node(ast, data.data)
         return {"result": evaluation_result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        cur.close()
-        conn.close()
 
 @app.post("/rules/evaluate-batch")
 async def evaluate_batch(input_data: BatchEvaluationInput):
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        
-        cur.execute("SELECT rule_id, ast FROM rules WHERE rule_id = ANY(%s)", (input_data.rule_ids,))
-        rules = {row[0]: row[1] for row in cur.fetchall()}
+    async with app.state.pool.acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT rule_id, md5(ast::text) AS ast_hash FROM rules WHERE rule_id = ANY($1)",
+            input_data.rule_ids
+        )
         
-        if len(rules) != len(input_data.rule_ids):
+        if len(rows) != len(input_data.rule_ids):
             raise HTTPException(status_code=404, detail="One or more rules not found")
         
-        results = []
-        for data in input_data.data_list:
-            data_results = {}
-            for rule_id, ast in rules.items():
-                try:
-                    data_results[rule_id] = evaluate_node(ast, data)
-                except Exception as e:
-                    data_results[rule_id] = str(e)
-            results.append({
-                "data": data,
-                "results": data_results
-            })
-        
-        return {"results": results}
-    finally:
-        cur.close()
-        conn.close()
+        # Only fetch and compile ASTs that are missing or stale in the cache
+        rules = {row["rule_id"]: get_compiled_rule(row["rule_id"], row["ast_hash"]) for row in rows}
+        stale = [rule_id for rule_id, rule in rules.items() if rule is None]
+        if stale:
+            for row in await conn.fetch(
+                "SELECT rule_id, md5(ast::text) AS ast_hash, ast FROM rules WHERE rule_id = ANY($1)",
+                stale
+            ):
+                rules[row["rule_id"]] = cache_compiled_rule(row["rule_id"], row["ast_hash"], row["ast"])
+            if None in rules.values():
+                raise HTTPException(status_code=404, detail="One or more rules not found")
+    
+    if len(input_data.data_list) >= EXECUTOR_MIN_ROWS:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, evaluate_rules_batch, rules, input_data.data_list)
+    else:
+        results = evaluate_rules_batch(rules, input_data.data_list)
+    
+    return ORJSONResponse({"results": results})
 
 @app.on_event("startup")
 async def startup_event():
-    create_tables()
+    app.state.pool = await asyncpg.create_pool(
+        min_size=POOL_MIN,
+        max_size=POOL_MAX,
+        statement_cache_size=STATEMENT_CACHE_SIZE,
+        init=init_connection,
+        **DB_CONFIG
+    )
+    await create_tables(app.state.pool)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.pool.close()
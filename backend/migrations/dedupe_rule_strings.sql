@@ -0,0 +1,17 @@
+-- Remove repeated copies of the same rule_string from `rules`, keeping the
+-- row with the lowest rule_id. Copies share the same AST; only their name,
+-- description and rule_id differ. Needed once on databases created before
+-- rule strings were made unique, after which the backend can build its
+-- unique index on rule_hash.
+--
+-- Usage: psql -d rule_engine -f backend/migrations/dedupe_rule_strings.sql
+
+BEGIN;
+
+DELETE FROM rules AS newer
+USING rules AS older
+WHERE newer.rule_string = older.rule_string
+  AND newer.rule_id > older.rule_id
+RETURNING newer.rule_id, newer.name, newer.rule_string;
+
+COMMIT;